@@ -1,12 +1,276 @@
 import flet as ft
 import os
+import re
 import json
 import datetime
-import uuid
+import secrets
 import asyncio
-import traceback
+import logging
+import operator
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
 from flet_audio_recorder import AudioRecorder, AudioEncoder, AudioRecorderState
 
+logger = logging.getLogger(__name__)
+
+SEARCH_DEBOUNCE_SECONDS = 0.18  # Quiet period after the last keystroke before searching
+MAX_SEARCH_RESULTS = 20  # Result tiles shown for a typed search
+MAX_LISTED_PATIENTS = 200  # Result tiles shown when listing all patients
+MAX_CONCURRENT_READS = 32  # Patient files read in parallel while indexing
+AUTOSAVE_INTERVAL_SECONDS = 4  # Edits are batched into one write per interval
+STATUS_CLEAR_SECONDS = 3  # Temporary status messages are cleared after this long
+INDEX_FILE_NAME = ".patient_index.json"  # Persisted search index inside the database folder
+
+# Shared compact encoder for the autosave path (no pretty-printing on every save)
+_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+# Prefer orjson for encoding/decoding patient files, fall back to the standard library
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(data):
+        return _ENCODER.encode(data).encode("utf-8")
+    _json_loads = json.loads
+
+# Optional: uvloop is a faster drop-in event loop; ft.app starts its loop with
+# asyncio.run, which honours the policy. It doesn't support Windows.
+if os.name != "nt":
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+# Optional: msgspec decodes just the indexed fields of a patient file into a
+# typed struct, skipping the long free-text descriptions the index never uses
+try:
+    import msgspec
+
+    class _IndexedFields(msgspec.Struct):
+        patient_id: str = ""
+        name: str = ""
+        surname: str = ""
+        date: str = ""
+
+    _decode_indexed = msgspec.json.Decoder(_IndexedFields).decode
+    _DECODE_ERRORS = (json.JSONDecodeError, msgspec.DecodeError)
+
+    def _index_loads(data):
+        try:
+            return msgspec.structs.asdict(_decode_indexed(data))
+        except msgspec.ValidationError:
+            return _json_loads(data)  # Valid JSON with unexpected field types
+except ImportError:
+    _index_loads = _json_loads
+    _DECODE_ERRORS = (json.JSONDecodeError,)
+
+# Optional: OS file notifications let the app skip rescanning an unchanged database
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+
+# O_BINARY keeps Windows from translating newlines; it is 0 elsewhere
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def _write_json(json_file, data):
+    """Write patient data to disk (blocking - run it in a worker thread)"""
+    _write_file(json_file, _json_dumps(data))
+
+
+def _write_file(path, payload):
+    """Atomically replace a file with the given bytes (blocking)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write a sibling temp file and swap it in, so a crash mid-write never
+    # leaves a truncated patient_data.json behind
+    tmp_file = path + ".tmp"
+    # Unbuffered: one write of the whole payload, flushed to disk before the swap
+    fd = os.open(tmp_file, _WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_file, path)
+
+
+def _list_patient_folders(database_path):
+    """List (folder name, patient_data.json path, folder mtime) under the database folder (blocking)"""
+    # scandir entries carry their file type, so is_dir() needs no extra stat call.
+    # Saves replace patient_data.json via a temp file, which bumps the folder mtime.
+    # Whether patient_data.json exists is left to the read (see _read_patient_file).
+    with os.scandir(database_path) as entries:
+        return [
+            (entry.name, os.path.join(entry.path, "patient_data.json"), entry.stat().st_mtime_ns)
+            for entry in entries
+            if entry.is_dir(follow_symlinks=False)
+        ]
+
+
+def _index_text(value):
+    """Indexed fields as text; hand-edited files may hold numbers or null"""
+    if isinstance(value, str):
+        return value
+    return "" if value is None else str(value)
+
+
+def _make_index_entry(data, folder, mtime_ns):
+    """Keep only the fields needed to search and list a patient"""
+    entry = {
+        "patient_id": _index_text(data.get("patient_id")),
+        "name": _index_text(data.get("name")),
+        "surname": _index_text(data.get("surname")),
+        "date": _index_text(data.get("date")),
+        "_folder": folder,  # Patient folder name within the database
+        "_mtime": mtime_ns,  # Folder mtime the entry was read at
+    }
+    # Lowercased copies are built once per record, not per keystroke
+    entry["_id_lc"] = entry["patient_id"].lower()
+    entry["_name_lc"] = entry["name"].lower()
+    entry["_surname_lc"] = entry["surname"].lower()
+    # Haystack for "All Fields" searches, newline-separated so a term
+    # can't match across two fields
+    entry["_hay"] = "\n".join(
+        (entry["_id_lc"], entry["_name_lc"], entry["_surname_lc"], entry["date"].lower())
+    )
+    # Result tile texts, so listing patients formats no strings
+    display_name = f"{entry['name']} {entry['surname']}"
+    if not display_name.strip():
+        display_name = f"Patient {entry['patient_id']}"
+    entry["_title"] = display_name
+    entry["_subtitle"] = f"ID: {entry['patient_id']}, Date: {entry['date']}"
+    return entry
+
+
+def _compact_index(index):
+    """Persisted form of the index: source fields only, under one-letter keys"""
+    return [
+        {"i": entry["patient_id"], "n": entry["name"], "s": entry["surname"],
+         "d": entry["date"], "f": entry["_folder"], "m": entry["_mtime"]}
+        for entry in index.values()
+    ]
+
+
+def _load_index_file(database_path):
+    """Read the persisted search index, keyed by folder name; {} if missing or unreadable (blocking)"""
+    try:
+        with open(os.path.join(database_path, INDEX_FILE_NAME), 'rb') as f:
+            entries = _json_loads(f.read())
+        # Files from before the compact format raise KeyError and are rebuilt
+        return {
+            entry["f"]: _make_index_entry(
+                {"patient_id": entry["i"], "name": entry["n"], "surname": entry["s"], "date": entry["d"]},
+                entry["f"],
+                entry["m"]
+            )
+            for entry in entries
+        }
+    except (OSError, ValueError, TypeError, KeyError):
+        return {}
+
+
+def _read_patient_file(json_file):
+    """Read the indexed fields of one patient_data.json, or None if it is missing or can't be parsed (blocking)"""
+    try:
+        with open(json_file, 'rb') as f:
+            data = _index_loads(f.read())
+    except FileNotFoundError:
+        return None  # e.g. a folder created for a recording before the first save
+    except _DECODE_ERRORS:
+        logger.warning("Could not parse JSON in %s", json_file)
+        return None
+    except OSError as ex:
+        # One unreadable file (locked, permissions) must not fail the whole gather
+        logger.warning("Could not read %s: %s", json_file, ex)
+        return None
+    if not isinstance(data, dict):
+        logger.warning("Unexpected JSON content in %s", json_file)
+        return None
+    return data
+
+
+@lru_cache(maxsize=128)
+def _load_cached(json_file, mtime_ns, size, inode):
+    """Parse a patient file; keyed on its stat so a rewritten file is read again"""
+    with open(json_file, 'rb') as f:
+        return _json_loads(f.read())
+
+
+def _load_patient_file(json_file):
+    """Load a patient file for the form (blocking)"""
+    # Re-selecting an unchanged patient is served from memory. On drives with
+    # coarse timestamps (FAT32/exFAT, some SMB shares) two saves can share an
+    # mtime, so size and inode are part of the key too; saves also clear the cache.
+    # Copy, since the form edits patient_data in place.
+    st = os.stat(json_file)
+    return dict(_load_cached(json_file, st.st_mtime_ns, st.st_size, st.st_ino))
+
+
+_RECORDING_NUMBER = re.compile(r"_(\d{4})\.wav$")
+
+
+def _next_recording_number(patient_folder):
+    """Number following the highest numbered recording (e.g. USG_0003.wav) in the folder"""
+    numbers = [
+        int(match.group(1))
+        for match in map(_RECORDING_NUMBER.search, os.listdir(patient_folder))
+        if match
+    ]
+    return max(numbers, default=0) + 1
+
+
+def _claim_recording_file(patient_folder, prefix, number):
+    """Reserve the first free <prefix>_<NNNN>.wav from number on, returning (path, number) (blocking)"""
+    while True:
+        path = os.path.join(patient_folder, f"{prefix}_{number:04d}.wav")
+        try:
+            # O_EXCL: fails instead of reusing a name taken since the folder was
+            # scanned, e.g. by another workstation sharing the database
+            os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+            return path, number
+        except FileExistsError:
+            number += 1
+
+
+# Recorder state -> (record button disabled, stop button disabled)
+_BUTTON_STATES = {
+    AudioRecorderState.RECORDING: (True, False),
+    AudioRecorderState.STOPPED: (False, True),
+}
+
+
+# Search type -> test of one index entry against a lowercased search term
+_SEARCH_MATCHERS = {
+    "id": lambda data, term: term in data["_id_lc"],
+    "name": lambda data, term: term in data["_name_lc"] or term in data["_surname_lc"],
+    "all": lambda data, term: term in data["_hay"],
+}
+
+
+class _DatabaseWatcher:
+    """watchdog event handler that marks the patient index as stale"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def dispatch(self, event):
+        # Runs on the observer thread; a plain attribute write needs no locking.
+        # Reads (open/close events) and folder "modified" events that merely
+        # echo a file event don't count, nor do writes of the index file itself.
+        if event.event_type not in ("created", "deleted", "moved", "modified"):
+            return
+        if event.is_directory and event.event_type == "modified":
+            return
+        if not os.path.basename(event.src_path).startswith(INDEX_FILE_NAME):
+            self.app._index_stale = True
+
+
 class PatientApp:
     def __init__(self):
         self.database_path = ""
@@ -24,12 +288,42 @@ class PatientApp:
         self.save_task = None
         self.original_patient_id = None
         self.page = None  # Store page reference
-        self.status_clear_task = None  # Add a reference to the status clear task
+        self.status_clear_task = None  # Clears temporary status messages, started on first use
+        self._status_clear_at = None  # Loop time at which to clear the status text, if any
+        self._status_wake = asyncio.Event()  # Wakes the idle status clear task
         self.search_type = "id"  # Default search type is by ID
         self.active_dialog = None  # Track active dialog
         self.show_fdg_pet = False  # Toggle state for FDG PET visibility
         self.show_additional_notes = False  # Toggle state for Additional Notes visibility
-        
+        self._last_button_state = (False, True)  # (record disabled, stop disabled)
+        self._update_pending = False  # A coalesced page update is queued on the event loop
+        self._search_task = None  # Single in-flight search, superseded by newer requests
+        self._search_seq = 0  # Incremented per search request to detect stale ones
+        self.patient_index = {}  # patient_id -> {"patient_id", "name", "surname", "date"}
+        self._index_path = None  # Database path the patient index was built for
+        self._index_version = 0  # Bumped whenever patient_index changes
+        self._sorted_index = (None, [])  # (index version, patient_index entries sorted by ID)
+        self._read_limit = asyncio.Semaphore(MAX_CONCURRENT_READS)  # Shared by overlapping index refreshes
+        self._index_stale = True  # Set when the database may have changed since the last refresh
+        self._observer = None  # watchdog observer for the database folder, if available
+        self._watched_path = None
+        self._watch_lock = asyncio.Lock()  # Overlapping refreshes must not start two observers
+        self._watch_task = None  # Latest observer set-up, awaited on cleanup
+        self._last_search = (None, None, "")  # (search type, index version, term) of the last search
+        self._last_matches = []  # All matches of the last search, sorted by ID
+        self._shown_key = None  # (index version, hidden count, IDs) currently in the results list
+        self._dirty = False  # True when patient data changed since the last save
+        self._last_saved = (None, None)  # (json file, encoded bytes) of the last write
+        self._save_lock = asyncio.Lock()  # Serializes patient file writes
+        self._refresh_lock = asyncio.Lock()  # Serializes index refreshes
+        self.immediate_save_requested = False  # Set by the Save button
+        self._changed = asyncio.Event()  # Wakes the autosave task
+        self._stop = asyncio.Event()  # Tells the autosave task to exit
+        self._today_cache = (None, "")  # (date, formatted date) for _today_str
+        self._recording_files = None  # (temporary file, final file) of the active recording
+        self._patient_folder = None  # Prepared folder of the current patient
+        self._rec_seq = 1  # Number of the next recording in _patient_folder
+
     async def main(self, page: ft.Page):
         # Store reference to page
         self.page = page
@@ -79,6 +373,11 @@ class PatientApp:
             height=200,
             visible=False
         )
+        # Tiles for a full page of typed-search results exist up front; searches
+        # only rewrite their text and visibility
+        self.search_results.controls = [self._new_tile() for _ in range(MAX_SEARCH_RESULTS)]
+        # Footer shown below a truncated result list
+        self._more_tile = ft.ListTile(title=ft.Text(italic=True), disabled=True)
         
         # Database path field
         self.db_path_field = ft.TextField(
@@ -97,29 +396,29 @@ class PatientApp:
         self.name_field = ft.TextField(
             label="Patient Name",
             value=self.patient_data["name"],
-            on_change=self.on_name_change,
+            on_change=self._bind("name"),
             expand=True
         )
         
         self.surname_field = ft.TextField(
             label="Patient Surname",
             value=self.patient_data["surname"],
-            on_change=self.on_surname_change,
+            on_change=self._bind("surname"),
             expand=True
         )
         
-        today = datetime.date.today().strftime("%Y-%m-%d")
+        today = self._today_str()
         self.date_field = ft.TextField(
             label="Date",
             value=today,
-            on_change=self.on_date_change
+            on_change=self._bind("date")
         )
         
         self.patient_id_field = ft.TextField(
             label="Patient ID",
             value=self.patient_data["patient_id"],
             read_only=False,  # Changed to allow manual editing
-            on_change=self.on_patient_id_change  # Added change handler
+            on_change=self._bind("patient_id")  # Manual edits update patient_data
         )
         
         generate_id_button = ft.ElevatedButton(
@@ -134,7 +433,7 @@ class PatientApp:
             min_lines=4,  # Slightly reduced to save space
             max_lines=8,  # Slightly reduced to save space
             value=self.patient_data["initial_description"],
-            on_change=self.on_initial_desc_change,
+            on_change=self._bind("initial_description"),
             expand=True
         )
         
@@ -144,7 +443,7 @@ class PatientApp:
             min_lines=4,  # Slightly reduced to save space
             max_lines=8,  # Slightly reduced to save space
             value=self.patient_data["scintigraphy"],
-            on_change=self.on_scintigraphy_change,
+            on_change=self._bind("scintigraphy"),
             expand=True
         )
         
@@ -154,7 +453,7 @@ class PatientApp:
             min_lines=4,  # Slightly reduced to save space
             max_lines=8,  # Slightly reduced to save space
             value=self.patient_data["fdg_pet"],
-            on_change=self.on_fdg_pet_change,
+            on_change=self._bind("fdg_pet"),
             expand=True,
             visible=self.show_fdg_pet  # Toggle visibility based on state
         )
@@ -166,11 +465,23 @@ class PatientApp:
             min_lines=4,  # Slightly reduced to save space
             max_lines=8,  # Slightly reduced to save space
             value=self.patient_data["additional_notes"],
-            on_change=self.on_additional_notes_change,
+            on_change=self._bind("additional_notes"),
             expand=True,
             visible=self.show_additional_notes  # Toggle visibility based on state
         )
         
+        # Patient data key -> input control, used to fill and clear the form
+        self._fields = {
+            "patient_id": self.patient_id_field,
+            "name": self.name_field,
+            "surname": self.surname_field,
+            "date": self.date_field,
+            "initial_description": self.initial_description,
+            "scintigraphy": self.scintigraphy,
+            "fdg_pet": self.fdg_pet,
+            "additional_notes": self.additional_notes
+        }
+        
         # Recording controls
         self.record_button = ft.ElevatedButton(
             text="Start Recording",
@@ -311,34 +622,45 @@ class PatientApp:
         page.on_disconnect = self.cleanup
         try:
             self.save_task = asyncio.create_task(self.auto_save_task())
-            print("Autosave task started successfully")
-        except Exception as ex:
-            print(f"Error starting autosave task: {str(ex)}")
-            traceback.print_exc()
+            logger.info("Autosave task started successfully")
+        except Exception:
+            logger.exception("Error starting autosave task")
 
     async def cleanup(self, e):
         """Cleanup when app disconnects"""
+        # Edits still inside the autosave window would otherwise be lost
+        await self._flush_pending_save()
+        self._stop.set()
+        self._changed.set()
         if self.save_task and not self.save_task.done():
             self.save_task.cancel()
+        if self.status_clear_task:
+            self.status_clear_task.cancel()
+        if self._watch_task:
+            # Let an observer still starting come up, so it can be stopped
+            await asyncio.wait([self._watch_task])
+        await asyncio.to_thread(self._stop_watching)
         
     async def handle_audio_state_change(self, e):
         """Handle audio recorder state changes"""
-        print(f"Audio state changed: {e.data}")
-        state = e.state
-        if state == AudioRecorderState.RECORDING:
-            self.record_button.disabled = True
-            self.stop_button.disabled = False
-        elif state == AudioRecorderState.STOPPED:
-            self.record_button.disabled = False
-            self.stop_button.disabled = True
-        
-        # Use self.page instead of e.page
-        if self.page:
-            self.page.update()
+        # Lazy %-formatting: costs nothing unless debug logging is enabled
+        logger.debug("Audio state changed: %s", e.data)
+        new_state = _BUTTON_STATES.get(e.state)
+        if new_state is None:
+            return
+
+        # Skip the page update when the buttons already reflect this state
+        if new_state == self._last_button_state:
+            return
+        self.record_button.disabled, self.stop_button.disabled = new_state
+        self._last_button_state = new_state
+
+        self.schedule_update()
         
     def on_db_path_change(self, e):
         """Handle database path changes"""
         self.database_path = e.control.value
+        self._mark_dirty()
         
     async def pick_directory(self, e):
         """Open directory picker to select database location"""
@@ -346,48 +668,41 @@ class PatientApp:
         if self.dir_picker:
             self.dir_picker.get_directory_path()
         
-    def on_dir_picker_result(self, e: ft.FilePickerResultEvent):
+    async def on_dir_picker_result(self, e: ft.FilePickerResultEvent):
         """Handle directory picker result"""
         if e.path:
             self.database_path = e.path
             self.db_path_field.value = e.path
+            self._mark_dirty()
             
-            # Use self.page instead of e.page and don't use await
-            if self.page:
-                self.page.update()
-                self.update_status("Database path set to: " + e.path)
+            # update_status flushes the path field change in the same page update
+            self.update_status("Database path set to: " + e.path)
+
+            # Index the newly selected database so searches run from memory
+            await self._refresh_index()
     
-    def on_name_change(self, e):
-        """Handle name field changes"""
-        self.patient_data["name"] = e.control.value
-        
-    def on_surname_change(self, e):
-        """Handle surname field changes"""
-        self.patient_data["surname"] = e.control.value
-        
-    def on_date_change(self, e):
-        """Handle date field changes"""
-        self.patient_data["date"] = e.control.value
+    def _bind(self, key):
+        """Change handler writing one field into patient_data.
         
-    def on_initial_desc_change(self, e):
-        """Handle initial description changes"""
-        self.patient_data["initial_description"] = e.control.value
-        
-    def on_scintigraphy_change(self, e):
-        """Handle scintigraphy changes"""
-        self.patient_data["scintigraphy"] = e.control.value
-        
-    def on_fdg_pet_change(self, e):
-        """Handle FDG PET changes"""
-        self.patient_data["fdg_pet"] = e.control.value
+        Async so Flet runs it on the event loop instead of handing each
+        keystroke to a worker thread.
+        """
+        async def on_change(e):
+            self.patient_data[key] = e.control.value
+            self._mark_dirty()
+        return on_change
     
-    def on_additional_notes_change(self, e):
-        """Handle additional notes changes"""
-        self.patient_data["additional_notes"] = e.control.value
+    def _mark_dirty(self):
+        """Flag unsaved changes, waking the autosave task on the first one"""
+        # Later edits while already dirty are picked up by the pending save
+        if not self._dirty:
+            self._dirty = True
+            self._wake_autosave()
     
-    def on_patient_id_change(self, e):
-        """Handle manual patient ID changes"""
-        self.patient_data["patient_id"] = e.control.value
+    def _wake_autosave(self):
+        """Wake the autosave task (handlers may run in worker threads)"""
+        if self.page:
+            self.page.loop.call_soon_threadsafe(self._changed.set)
     
     def generate_patient_id(self, e):
         """Generate a unique patient ID based on date and name/surname if available"""
@@ -405,66 +720,70 @@ class PatientApp:
             else:
                 surname_part = "XX"
                 
-            unique_part = str(uuid.uuid4())[:5]
+            unique_part = secrets.token_hex(3)[:5]
             
             suggested_id = f"{date_str}-{name_part}{surname_part}-{unique_part}"
             
             # Check if ID already exists and suggest modification if it does
-            if self.database_path:
-                patient_folder = os.path.join(self.database_path, suggested_id)
-                if os.path.exists(patient_folder):
-                    # Generate an alternative
-                    alt_unique_part = str(uuid.uuid4())[:5]
-                    suggested_id = f"{date_str}-{name_part}{surname_part}-{alt_unique_part}"
-                    self.update_status(f"Original ID exists. Suggested alternative: {suggested_id}")
-                    
-                    # Create and show dialog for ID conflict
-                    dialog = ft.AlertDialog(
-                        title=ft.Text("Patient ID Exists"),
-                        content=ft.Text(f"Patient ID already exists. Would you like to load the existing data?"),
-                        actions=[
-                            ft.TextButton("Yes", on_click=lambda e, pid=suggested_id: self.load_existing_patient(e, pid)),
-                            ft.TextButton("No", on_click=self.close_dialog),
-                        ],
-                    )
-                    self.show_dialog(dialog)
-                    return
+            if self.database_path and self._patient_id_taken(suggested_id):
+                existing_id = suggested_id
+                # Generate an alternative
+                alt_unique_part = secrets.token_hex(3)[:5]
+                suggested_id = f"{date_str}-{name_part}{surname_part}-{alt_unique_part}"
+                self.update_status(f"Original ID exists. Suggested alternative: {suggested_id}")
+                
+                # Create and show dialog for ID conflict
+                dialog = ft.AlertDialog(
+                    title=ft.Text("Patient ID Exists"),
+                    content=ft.Text(f"Patient ID already exists. Would you like to load the existing data?"),
+                    actions=[
+                        ft.TextButton("Yes", data=existing_id, on_click=self.load_existing_patient),
+                        ft.TextButton("No", on_click=self.close_dialog),
+                    ],
+                )
+                self.show_dialog(dialog)
+                return
             
             # Set the suggested ID but allow user to modify
             self.patient_data["patient_id"] = suggested_id
             self.patient_id_field.value = suggested_id
+            self._mark_dirty()
             self.original_patient_id = None  # Reset original ID since this is a new one
             
-            if self.page:
-                self.page.update()
+            # One page update for both the ID field and the status text
             self.update_status(f"Patient ID suggested: {suggested_id}. You can edit it if needed.")
             
         except Exception as ex:
-            print(f"Error generating patient ID: {str(ex)}")
-            traceback.print_exc()
+            logger.exception("Error generating patient ID")
             self.update_status(f"Error generating patient ID: {str(ex)}")
 
+    def _patient_id_taken(self, patient_id):
+        """Whether a patient with this ID exists, answered from the index when it is current"""
+        if self._index_path == self.database_path:
+            return patient_id in self.patient_index
+        return os.path.isdir(os.path.join(self.database_path, patient_id))
+
     def show_dialog(self, dialog):
         """Helper method to safely show dialogs"""
         if self.page:
             self.active_dialog = dialog
             self.page.dialog = dialog
             dialog.open = True
-            self.page.update()
+            self.schedule_update()
 
     def close_dialog(self, e):
         """Close the dialog safely"""
         if self.page and self.page.dialog:
             self.page.dialog.open = False
-            self.page.update()
+            self.schedule_update()
             self.active_dialog = None
     
-    def load_existing_patient(self, e, patient_id):
-        """Load existing patient data from ID conflict dialog"""
+    async def load_existing_patient(self, e):
+        """Load existing patient data from ID conflict dialog (the button carries the ID)"""
         # Close the dialog first
         self.close_dialog(e)
         # Now load the patient
-        self.load_patient(e, patient_id)
+        await self.load_patient(e, e.control.data)
     
     def start_recording(self, e):
         """Start audio recording"""
@@ -482,281 +801,400 @@ class PatientApp:
             if not prefix:
                 prefix = "USG"  # Default to USG if empty
                 
-            # Create filename with timestamp and prefix
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            patient_folder = os.path.join(self.database_path, self.patient_data["patient_id"])
-            filename = os.path.join(patient_folder, f"{prefix}_{timestamp}.wav")
-            
-            # Ensure the directory exists
-            if not os.path.exists(patient_folder):
-                os.makedirs(patient_folder)
-            
-            print(f"Starting recording to file: {filename}")
-            
             # Explicitly check if recorder is initialized
             if self.audio_rec is None:
                 self.update_status("Audio recorder not initialized")
                 return
+                
+            # Create filename with prefix and a per-patient sequence number. The
+            # name is reserved on disk now, so a later folder rescan can't hand
+            # it out again before this recording is moved in.
+            patient_folder = self._ensure_patient_folder()
+            filename, number = _claim_recording_file(patient_folder, prefix, self._rec_seq)
+            self._rec_seq = number + 1
             
-            # Create a result handler for recording
-            def handle_recording_result(e):
-                if e.data == "true":
-                    self.update_status(f"Recording started. Saving to {filename}")
-                else:
-                    self.update_status("Failed to start recording")
+            # Record next to the final file (e.g. USG_0003.part.wav), so the take
+            # is on the database disk while recording and renamed in place once
+            # recording stops
+            temp_filename = os.path.splitext(filename)[0] + ".part.wav"
             
-            # Register a one-time handler for the result
-            self.audio_rec.on_result = handle_recording_result
+            logger.info("Starting recording to file: %s (final: %s)", temp_filename, filename)
             
-            # Start recording - don't pass callback directly
-            self.audio_rec.start_recording(filename)
-            print("Recording started")
+            if self.audio_rec.start_recording(temp_filename):
+                self._recording_files = (temp_filename, filename)
+                self.update_status(f"Recording started. Saving to {filename}")
+                logger.info("Recording started")
+            else:
+                os.remove(filename)  # Release the reserved name
+                self.update_status("Failed to start recording")
         except Exception as ex:
-            print(f"Error starting recording: {str(ex)}")
-            traceback.print_exc()
+            logger.exception("Error starting recording")
             self.update_status(f"Error starting recording: {str(ex)}")
     
-    def stop_recording(self, e):
-        """Stop audio recording"""
+    def _ensure_patient_folder(self):
+        """Create the current patient's folder once and find the next recording number"""
+        patient_folder = os.path.join(self.database_path, self.patient_data["patient_id"])
+        if patient_folder != self._patient_folder:
+            os.makedirs(patient_folder, exist_ok=True)
+            self._rec_seq = _next_recording_number(patient_folder)
+            self._patient_folder = patient_folder
+        return patient_folder
+    
+    async def stop_recording(self, e):
+        """Stop audio recording and move the file into the patient folder"""
         try:
-            print("Stopping recording...")
+            logger.info("Stopping recording...")
             
             # Explicitly check if recorder is initialized
             if self.audio_rec is None:
                 self.update_status("Audio recorder not initialized")
                 return
             
-            # Create a result handler for stopping
-            def handle_stop_result(e):
-                output_path = e.data
-                print(f"Recording stopped. Output path: {output_path}")
-                if output_path and output_path != "null":
-                    self.update_status(f"Recording saved to: {output_path}")
-                else:
-                    self.update_status("Recording stopped, but file was not saved")
+            output_path = await self.audio_rec.stop_recording_async()
+            logger.info("Recording stopped. Output path: %s", output_path)
             
-            # Register a one-time handler for the result
-            self.audio_rec.on_result = handle_stop_result
+            recording_files, self._recording_files = self._recording_files, None
+            if not output_path or output_path == "null" or recording_files is None:
+                if recording_files:
+                    # Release the name reserved when recording started
+                    await asyncio.to_thread(os.remove, recording_files[1])
+                self.update_status("Recording stopped, but file was not saved")
+                return
             
-            # Stop recording without callback
-            self.audio_rec.stop_recording()
+            # Rename off the event loop, replacing the empty file that reserved the name
+            temp_filename, filename = recording_files
+            try:
+                await asyncio.to_thread(os.replace, temp_filename, filename)
+            except OSError:
+                logger.exception("Could not rename %s to %s", temp_filename, filename)
+                self.update_status(f"Recording kept as: {temp_filename} (could not rename it)")
+                return
+            self.update_status(f"Recording saved to: {filename}")
         except Exception as ex:
-            print(f"Error stopping recording: {str(ex)}")
-            traceback.print_exc()
+            logger.exception("Error stopping recording")
             self.update_status(f"Error stopping recording: {str(ex)}")
     
     async def on_search_change(self, e):
         """Handle search field changes and show matching patients"""
         search_term = e.control.value.strip().lower()
+        # Debounce so a burst of keystrokes results in a single scan
+        self.schedule_search(search_term, delay=SEARCH_DEBOUNCE_SECONDS)
+
+    def schedule_search(self, search_term, delay=0):
+        """Run a search on the event loop, cancelling any stale search still pending"""
+        self._cancel_pending_search()
+        self._search_task = asyncio.create_task(
+            self._do_search(self._search_seq, search_term, delay)
+        )
+
+    def _cancel_pending_search(self):
+        """Make any search requested so far stale"""
+        self._search_seq += 1
+        if self._search_task and not self._search_task.done():
+            self._search_task.cancel()
+
+    async def _do_search(self, seq, search_term, delay):
+        """Wait out the debounce delay, then search unless a newer request arrived"""
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        if seq != self._search_seq:
+            return
         await self.perform_search(search_term)
     
     async def perform_search(self, search_term):
         """Perform search based on the current search type and term"""
-        if not self.database_path or not os.path.exists(self.database_path):
+        # Once the index is built for this path, searching needs no disk access
+        if self._index_path != self.database_path and not await self._database_available():
             self.update_status("Please set a valid database path first")
             return
             
         # Even if search term is empty, we'll show all patients
         # This makes the dropdown work when just clicking the field
         
-        # Search for matching patients
-        matching_patients = []
+        # Search for matching patients in the in-memory index
         try:
-            if os.path.exists(self.database_path):
-                for folder in os.listdir(self.database_path):
-                    folder_path = os.path.join(self.database_path, folder)
-                    if os.path.isdir(folder_path):
-                        json_file = os.path.join(folder_path, "patient_data.json")
-                        if os.path.exists(json_file):
-                            try:
-                                with open(json_file, 'r') as f:
-                                    data = json.load(f)
-                                    
-                                    # If search term is empty, include all patients
-                                    if not search_term:
-                                        matching_patients.append(data)
-                                        continue
-                                    
-                                    # Match based on selected search type
-                                    is_match = False
-                                    
-                                    if self.search_type == "id":
-                                        # Search by ID only
-                                        if search_term in data.get("patient_id", "").lower():
-                                            is_match = True
-                                            
-                                    elif self.search_type == "name":
-                                        # Search by name or surname
-                                        if (search_term in data.get("name", "").lower() or
-                                            search_term in data.get("surname", "").lower()):
-                                            is_match = True
-                                            
-                                    else:  # "all" - search all fields
-                                        if (search_term in data.get("patient_id", "").lower() or
-                                            search_term in data.get("name", "").lower() or 
-                                            search_term in data.get("surname", "").lower() or
-                                            search_term in data.get("date", "").lower()):
-                                            is_match = True
-                                        
-                                    if is_match:
-                                        matching_patients.append(data)
-                                        
-                            except json.JSONDecodeError:
-                                continue
+            await self._ensure_index()
+
+            # When the term only extends the previous one, its matches are a
+            # subset of the previous matches - filter those instead of the index
+            search_type, index_version, last_term = self._last_search
+            if (search_type == self.search_type and index_version == self._index_version
+                    and search_term.startswith(last_term)):
+                candidates = self._last_matches
+            else:
+                candidates = self._sorted_patients()
+
+            # If search term is empty, include all patients; otherwise pick the
+            # matcher for the selected search type once, not per record
+            if search_term:
+                matches = _SEARCH_MATCHERS.get(self.search_type, _SEARCH_MATCHERS["all"])
+                matching_patients = [data for data in candidates if matches(data, search_term)]
+            else:
+                matching_patients = list(candidates)
                 
-            # Update the search results list
-            self.search_results.controls.clear()
+            self._last_search = (self.search_type, self._index_version, search_term)
+            self._last_matches = matching_patients
             
             if matching_patients:
-                # Sort results for better display
-                matching_patients.sort(key=lambda x: x.get('patient_id', ''))
-                
-                for patient in matching_patients:
-                    patient_id = patient.get('patient_id', '')
-                    name = patient.get('name', '')
-                    surname = patient.get('surname', '')
-                    date = patient.get('date', '')
-                    
-                    # Create a properly bound callback for each patient
-                    # This is crucial - we need to create a new function for each patient ID
-                    self.search_results.controls.append(
-                        ft.ListTile(
-                            title=ft.Text(f"{name} {surname}"),
-                            subtitle=ft.Text(f"ID: {patient_id}, Date: {date}"),
-                            # Fix the lambda with a default argument for proper binding
-                            on_click=self.create_patient_loader(patient_id)
-                        )
-                    )
+                # Candidates come sorted by ID, so matches are already in display
+                # order; typed searches show fewer tiles than the full listing
+                limit = MAX_SEARCH_RESULTS if search_term else MAX_LISTED_PATIENTS
+                shown = matching_patients[:limit]
+                hidden = len(matching_patients) - len(shown)
+                changed = self.show_results(shown, hidden) or not self.search_results.visible
                 self.search_results.visible = True
             else:
+                changed = self.search_results.visible
                 self.search_results.visible = False
-                if search_term:  # Only show "no matches" for actual searches
-                    self.update_status(f"No matches found for '{search_term}'")
                 
-            if self.page:
-                await self.page.update()
+            # At most one page update per search (update_status flushes the page);
+            # none when the keystroke left the visible results as they were
+            if not matching_patients and search_term:  # Only show "no matches" for actual searches
+                self.update_status(f"No matches found for '{search_term}'")
+            elif changed:
+                self.schedule_update()
             
         except Exception as ex:
-            print(f"Error searching patients: {str(ex)}")
-            traceback.print_exc()
+            logger.exception("Error searching patients")
             self.update_status(f"Error searching patients: {str(ex)}")
     
-    def create_patient_loader(self, patient_id):
-        """Create a callback function for loading a specific patient"""
-        def load_this_patient(e):
-            self.load_patient(e, patient_id)
-        return load_this_patient
+    def _sorted_patients(self):
+        """Index entries ordered by patient ID, re-sorted only after the index changed"""
+        version, entries = self._sorted_index
+        if version != self._index_version:
+            entries = sorted(self.patient_index.values(), key=operator.itemgetter("patient_id"))
+            self._sorted_index = (self._index_version, entries)
+        return entries
+    
+    def _new_tile(self):
+        """Empty, hidden search result tile"""
+        # One shared click handler; the tile carries its patient ID in .data
+        return ft.ListTile(
+            title=ft.Text(),
+            subtitle=ft.Text(),
+            visible=False,
+            on_click=self._on_patient_tile
+        )
+    
+    def show_results(self, patients, hidden=0):
+        """Fill the search results list, reusing existing tiles where possible.
+        
+        Returns False if the list already showed exactly these results.
+        """
+        key = (self._index_version, hidden, [patient['patient_id'] for patient in patients])
+        if key == self._shown_key:
+            return False
+        self._shown_key = key
+        tiles = self.search_results.controls
+        if tiles and tiles[-1] is self._more_tile:
+            tiles.pop()
+        for i, patient in enumerate(patients):
+            # Mutate an existing tile instead of allocating a new one
+            if i == len(tiles):
+                tiles.append(self._new_tile())
+            tile = tiles[i]
+            tile.title.value = patient['_title']
+            tile.subtitle.value = patient['_subtitle']
+            tile.data = patient['patient_id']
+            tile.visible = True
+        # Hide tiles left over from a longer previous result list, keeping a
+        # full page of them for later searches
+        for tile in tiles[len(patients):MAX_SEARCH_RESULTS]:
+            tile.visible = False
+        del tiles[max(len(patients), MAX_SEARCH_RESULTS):]
+        if hidden:
+            self._more_tile.title.value = f"…{hidden} more results, refine your search"
+            tiles.append(self._more_tile)
+        return True
+    
+    async def _database_available(self):
+        """Check the database folder exists without blocking the event loop"""
+        if not self.database_path:
+            return False
+        return await asyncio.to_thread(os.path.isdir, self.database_path)
+    
+    async def _ensure_index(self):
+        """Build the patient index if it was not built for the current database path"""
+        if self._index_path != self.database_path:
+            await self._refresh_index()
+
+    async def _refresh_index(self):
+        """Bring the patient index up to date, re-reading only folders whose mtime changed"""
+        # Refreshes take turns: they share the index .tmp file, and one waiting
+        # behind another only re-reads what changed in between
+        async with self._refresh_lock:
+            await self._update_index()
+
+    async def _update_index(self):
+        """Body of _refresh_index; callers hold _refresh_lock"""
+        database_path = self.database_path
+        if not database_path or not await asyncio.to_thread(os.path.isdir, database_path):
+            self.patient_index = {}
+            self._index_path = database_path
+            self._index_version += 1
+            return
+        
+        # Changes reported from here on are picked up by the next refresh
+        self._index_stale = False
+        
+        # Directory walk and JSON parsing happen off the event loop
+        if self._index_path == database_path:
+            known = {entry["_folder"]: entry for entry in self.patient_index.values()}
+        else:
+            # New database: start from the index persisted by an earlier session
+            known = await asyncio.to_thread(_load_index_file, database_path)
+        folders = await asyncio.to_thread(_list_patient_folders, database_path)
+        
+        stale = [
+            (folder, json_file, mtime_ns) for folder, json_file, mtime_ns in folders
+            if folder not in known or known[folder]["_mtime"] != mtime_ns
+        ]
+        
+        # Read files concurrently so per-file latency overlaps (matters on
+        # network drives), bounded so a large database can't exhaust threads
+        async def read(json_file):
+            async with self._read_limit:
+                return await asyncio.to_thread(_read_patient_file, json_file)
+        
+        results = await asyncio.gather(*(read(json_file) for _, json_file, _ in stale))
+        fresh = {
+            folder: _make_index_entry(data, folder, mtime_ns)
+            for (folder, _, mtime_ns), data in zip(stale, results)
+            if data is not None
+        }
+        
+        # Unchanged folders keep their entry; unparseable ones are left out
+        stale_folders = {folder for folder, _, _ in stale}
+        index = {}
+        for folder, _, _ in folders:
+            entry = fresh.get(folder) if folder in stale_folders else known[folder]
+            if entry is not None:
+                index[entry["patient_id"]] = entry
+        
+        # Folders without a readable file are retried next time but don't
+        # count as a change on their own
+        changed = bool(fresh) or index.keys() != {entry["patient_id"] for entry in known.values()}
+        if changed or self._index_path != database_path:
+            self._index_version += 1
+        self.patient_index = index
+        self._index_path = database_path
+        if changed:
+            # Persist so the next session can skip reading unchanged folders
+            try:
+                await asyncio.to_thread(
+                    _write_json,
+                    os.path.join(database_path, INDEX_FILE_NAME),
+                    _compact_index(index)
+                )
+            except OSError as ex:
+                logger.warning("Could not write search index: %s", ex)
+        await self._watch_database(database_path)
+
+    async def _watch_database(self, database_path):
+        """Watch the database folder for changes, if watchdog is installed"""
+        if Observer is None:
+            return
+        # Shielded: a search cancelled mid-refresh would otherwise leave an
+        # observer running that _stop_watching doesn't know about
+        self._watch_task = asyncio.ensure_future(self._start_watching(database_path))
+        await asyncio.shield(self._watch_task)
+
+    async def _start_watching(self, database_path):
+        """Replace the observer with one for database_path, unless already watching it"""
+        async with self._watch_lock:
+            if self._watched_path == database_path:
+                return
+            await asyncio.to_thread(self._stop_watching)
+            self._watched_path = database_path
+            observer = Observer()
+            observer.schedule(_DatabaseWatcher(self), database_path, recursive=True)
+            try:
+                # Setting up recursive watches touches every folder - keep it off the loop
+                await asyncio.to_thread(observer.start)
+            except OSError as ex:  # e.g. the inotify watch limit was reached
+                logger.warning("Could not watch database folder: %s", ex)
+                return
+            self._observer = observer
+
+    def _stop_watching(self):
+        """Stop the database folder observer (blocking)"""
+        observer, self._observer = self._observer, None
+        if observer:
+            observer.stop()
+            observer.join(timeout=2)
+
+    async def _on_patient_tile(self, e):
+        """Load the patient whose search result tile was clicked"""
+        await self.load_patient(e, e.control.data)
     
     async def on_search_focus(self, e):
         """Handle when search field gets focus - show all patients immediately"""
-        print("Search field focused - loading all patients")
+        logger.debug("Search field focused - loading all patients")
         
         # Clear any existing search term to ensure all patients are shown
         if self.search_text.value:
             self.search_text.value = ""
         
-        if not self.database_path or not os.path.exists(self.database_path):
+        if not await self._database_available():
             self.update_status("Please set a valid database path first")
             return
         
         # Always show all patients when focusing
         try:
+            # Refresh the index on focus so records changed outside the app show
+            # up; while the folder is watched, only after a change was reported
+            if self._observer is None or self._index_stale:
+                await self._refresh_index()
             await self.load_all_patients()
-            print("All patients loaded successfully")
-        except Exception as ex:
-            print(f"Error loading patients on focus: {str(ex)}")
-            traceback.print_exc()
+            logger.debug("All patients loaded successfully")
+        except Exception:
+            logger.exception("Error loading patients on focus")
             self.update_status("Error loading patient list")
     
     async def load_all_patients(self):
         """Load and display all available patients"""
         try:
-            if not self.database_path or not os.path.exists(self.database_path):
+            if not await self._database_available():
                 self.update_status("Please set a valid database path first")
                 return
                 
-            all_patients = []
-            patient_count = 0
-            
-            # Count directories first to give user feedback
-            for item in os.listdir(self.database_path):
-                if os.path.isdir(os.path.join(self.database_path, item)):
-                    patient_count += 1
+            await self._ensure_index()
+            all_patients = self._sorted_patients()
             
-            if patient_count == 0:
-                self.update_status("No patient records found in database")
+            if not all_patients:
                 self.search_results.visible = False
-                if self.page:
-                    self.page.update()
+                self.update_status("No patient records found in database")
                 return
             
-            self.update_status(f"Loading {patient_count} patient records...")
-            
-            # Now load the patient data
-            for folder in os.listdir(self.database_path):
-                folder_path = os.path.join(self.database_path, folder)
-                if os.path.isdir(folder_path):
-                    json_file = os.path.join(folder_path, "patient_data.json")
-                    if os.path.exists(json_file):
-                        try:
-                            with open(json_file, 'r') as f:
-                                data = json.load(f)
-                                all_patients.append(data)
-                        except json.JSONDecodeError:
-                            print(f"Warning: Could not parse JSON in {json_file}")
-                            continue
-            
-            # Update search results
-            self.search_results.controls.clear()
-            
-            if all_patients:
-                # Sort patients by ID for better display
-                all_patients.sort(key=lambda x: x.get('patient_id', ''))
-                
-                for patient in all_patients:
-                    patient_id = patient.get('patient_id', '')
-                    name = patient.get('name', '')
-                    surname = patient.get('surname', '')
-                    
-                    display_name = f"{name} {surname}"
-                    if not display_name.strip():
-                        display_name = f"Patient {patient_id}"
-                    
-                    self.search_results.controls.append(
-                        ft.ListTile(
-                            title=ft.Text(display_name),
-                            subtitle=ft.Text(f"ID: {patient_id}, Date: {patient.get('date', '')}"),
-                            on_click=self.create_patient_loader(patient_id)
-                        )
-                    )
-                
-                self.search_results.visible = True
-                self.update_status(f"Found {len(all_patients)} patients")
-            else:
-                self.search_results.visible = False
-                self.update_status("No patient data available")
-                
-            # Update the page to show the results
-            if self.page:
-                self.page.update()
+            # update_status shows the results and the count in a single page update
+            shown = all_patients[:MAX_LISTED_PATIENTS]
+            self.show_results(shown, len(all_patients) - len(shown))
+            self.search_results.visible = True
+            self.update_status(f"Found {len(all_patients)} patients")
                 
         except Exception as ex:
-            print(f"Error loading all patients: {str(ex)}")
-            traceback.print_exc()
-            self.update_status(f"Error loading patients: {str(ex)}")
+            logger.exception("Error loading all patients")
             # Ensure the results are hidden on error
             self.search_results.visible = False
-            if self.page:
-                self.page.update()
+            self.update_status(f"Error loading patients: {str(ex)}")
     
-    def on_search_type_change(self, e):
+    async def on_search_type_change(self, e):
         """Handle search type radio button changes"""
-        self.search_type = e.value
+        self.search_type = e.control.value
         # If there's text in the search field, re-trigger the search
         if self.search_text.value:
-            asyncio.create_task(self.perform_search(self.search_text.value))
+            search_term = self.search_text.value.strip().lower()
+            if self._index_path == self.database_path:
+                # Warm index: re-filter it right away, no task or disk access needed
+                self._cancel_pending_search()
+                await self.perform_search(search_term)
+            else:
+                self.schedule_search(search_term)
     
-    def load_patient(self, e, patient_id):
+    async def load_patient(self, e, patient_id):
         """Load patient data when selected from search results"""
         try:
             if not patient_id or not self.database_path:
@@ -765,123 +1203,162 @@ class PatientApp:
             # We don't need to check for dialog here - that was causing the error
             # Instead, just close the search results
             self.search_results.visible = False
+            
+            # Don't drop the current patient's edits still waiting for autosave
+            if not await self._flush_pending_save():
+                return
                 
             patient_folder = os.path.join(self.database_path, patient_id)
             json_file = os.path.join(patient_folder, "patient_data.json")
             
-            if os.path.exists(json_file):
-                try:
-                    with open(json_file, 'r') as f:
-                        data = json.load(f)
-                        
-                    # Update the form fields
-                    self.patient_data = data
-                    self.name_field.value = data.get("name", "")
-                    self.surname_field.value = data.get("surname", "")
-                    self.date_field.value = data.get("date", "")
-                    self.patient_id_field.value = data.get("patient_id", "")
-                    self.initial_description.value = data.get("initial_description", "")
-                    self.scintigraphy.value = data.get("scintigraphy", "")
-                    self.fdg_pet.value = data.get("fdg_pet", "")
-                    
-                    # Add support for the new additional_notes field with fallback
-                    self.additional_notes.value = data.get("additional_notes", "")
-                    
-                    # Remember the original ID to avoid warning when saving the same patient
-                    self.original_patient_id = patient_id
-                    
-                    if self.page:
-                        self.page.update()
-                    self.update_status(f"Loaded patient: {data.get('name', '')} {data.get('surname', '')}")
+            try:
+                # The read runs in a worker thread so a slow disk can't stall the UI;
+                # a missing file surfaces as FileNotFoundError, no exists() check needed
+                data = await asyncio.to_thread(_load_patient_file, json_file)
                     
-                except Exception as ex:
-                    print(f"Error loading patient data: {str(ex)}")
-                    traceback.print_exc()
-                    self.update_status(f"Error loading patient data: {str(ex)}")
-            else:
+                # Update the form fields
+                self.patient_data = data
+                self._dirty = False  # Matches what is on disk
+                # A save before any edit would write the same content back
+                self._last_saved = (json_file, _json_dumps(data))
+                # Fields missing from older records (e.g. additional_notes) fall back to ""
+                for key, field in self._fields.items():
+                    field.value = data.get(key, "")
+                
+                # Remember the original ID to avoid warning when saving the same patient
+                self.original_patient_id = patient_id
+                await asyncio.to_thread(self._ensure_patient_folder)
+                
+                # Fields, hidden results and status go out in one page update
+                self.update_status(f"Loaded patient: {data.get('name', '')} {data.get('surname', '')}")
+                
+            except FileNotFoundError:
                 self.update_status(f"Patient data file not found")
+            except Exception as ex:
+                logger.exception("Error loading patient data")
+                self.update_status(f"Error loading patient data: {str(ex)}")
         except Exception as ex:
-            print(f"Error in load_patient: {str(ex)}")
-            traceback.print_exc()
+            logger.exception("Error in load_patient")
             self.update_status(f"Error loading patient: {str(ex)}")
     
     async def save_patient_data(self):
         """Save current patient data to JSON file"""
         try:
-            if not self.patient_data["patient_id"] or not self.database_path:
+            # Work from a snapshot: field handlers in other threads may edit
+            # patient_data while it is encoded, and the folder must match the
+            # ID being written. All values are strings, so a shallow copy is enough.
+            snapshot = self.patient_data.copy()
+            database_path = self.database_path
+            if not snapshot["patient_id"] or not database_path:
                 return False
                 
-            patient_folder = os.path.join(self.database_path, self.patient_data["patient_id"])
-            
-            # Check if patient folder exists, create if it doesn't
-            if not os.path.exists(patient_folder):
-                os.makedirs(patient_folder)
+            patient_folder = os.path.join(database_path, snapshot["patient_id"])
                 
             # Save patient data
             json_file = os.path.join(patient_folder, "patient_data.json")
             
-            print(f"Saving patient data to: {json_file}")
-            
-            with open(json_file, 'w') as f:
-                json.dump(self.patient_data, f, indent=4)
+            # Skip the write when the file would get exactly the bytes it holds
+            payload = _json_dumps(snapshot)
+            # Autosave and a flush before switching patients may overlap; they
+            # share the .tmp file, so writes take turns
+            async with self._save_lock:
+                if self._last_saved == (json_file, payload):
+                    return True
+                
+                logger.info("Saving patient data to: %s", json_file)
+                
+                # Write in a worker thread so the UI stays responsive
+                await asyncio.to_thread(_write_file, json_file, payload)
+                self._last_saved = (json_file, payload)
+                # The file's stat may look unchanged on coarse-timestamp drives
+                _load_cached.cache_clear()
+
+            # Keep the search index in step with what is on disk
+            if self._index_path == database_path:
+                # The write changed the folder mtime; None makes the next refresh
+                # re-read it once and record the new value
+                entry = _make_index_entry(snapshot, snapshot["patient_id"], None)
+                self.patient_index[entry["patient_id"]] = entry
+                self._index_version += 1
             return True
         except Exception as ex:
-            print(f"Error saving patient data: {str(ex)}")
-            traceback.print_exc()
+            logger.exception("Error saving patient data")
             self.update_status(f"Error saving patient data: {str(ex)}")
             return False
     
+    async def _flush_pending_save(self):
+        """Save edits autosave hasn't written yet; False if that save failed"""
+        # Without an ID or database path there is nowhere to save the edits to
+        if not (self._dirty and self.patient_data["patient_id"] and self.database_path):
+            return True
+        self._dirty = False
+        if await self.save_patient_data():
+            return True
+        self._dirty = True  # save_patient_data already reported the error
+        return False
+    
     async def auto_save_task(self):
-        """Periodically auto-save patient data"""
-        print("Auto-save task started")
-        # Add a flag for immediate save requests
-        self.immediate_save_requested = False
+        """Auto-save patient data while it has unsaved changes"""
+        logger.info("Auto-save task started")
+        loop = asyncio.get_running_loop()
         
-        while True:
+        while not self._stop.is_set():
+            # Sleep until something changes - an idle form causes no wakeups
+            await self._changed.wait()
+            self._changed.clear()
+            
+            # Batch edits made during the autosave interval into one write. The
+            # window is a fixed deadline from the first edit, so other wakeups
+            # (e.g. an edit after loading a patient) don't cut it short; only a
+            # Save button press or shutdown ends it early.
+            deadline = loop.time() + AUTOSAVE_INTERVAL_SECONDS
+            while not (self.immediate_save_requested or self._stop.is_set()):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._changed.clear()
+            
+            if self._stop.is_set():
+                break
+            
             try:
                 if self.patient_data["patient_id"] and self.database_path:
-                    should_save = False
-                    
                     # Check if immediate save was requested
-                    if self.immediate_save_requested:
-                        print("Immediate save requested")
-                        should_save = True
+                    immediate = self.immediate_save_requested
+                    if immediate:
+                        logger.info("Immediate save requested")
                         self.immediate_save_requested = False  # Reset the flag
-                    else:
-                        # Otherwise, it's a regular autosave
-                        print("Performing regular auto-save...")
-                        should_save = True
+                    elif self._dirty:
+                        # Otherwise, it's a regular autosave of unsaved edits
+                        logger.info("Performing regular auto-save...")
                     
-                    if should_save:
+                    if immediate or self._dirty:
+                        # Clear before writing so edits made during the write are kept dirty
+                        self._dirty = False
                         save_result = await self.save_patient_data()
                         if save_result:
-                            print("Save successful")
-                            if self.immediate_save_requested == False:  # Only show for manual saves
+                            logger.info("Save successful")
+                            if immediate:  # Only show for manual saves
                                 self.update_status("Patient data saved successfully")
                             else:
                                 # For autosaves, use a less intrusive message
-                                self.update_status("Auto-saved patient data")
+                                self.update_status("Auto-saved patient data", temporary=True)
                         else:
-                            print("Save returned False")
+                            logger.warning("Save returned False")
+                            self._dirty = True
+                            self._changed.set()  # Retry after the next interval
                             self.update_status("Failed to save patient data")
                 else:
-                    print("Skipping save - no patient ID or database path")
+                    logger.info("Skipping save - no patient ID or database path")
+                    # Setting the ID or database path marks the data dirty again
+                    self._dirty = False
             except Exception as ex:
-                print(f"Save error: {str(ex)}")
-                traceback.print_exc()
+                logger.exception("Save error")
                 self.update_status(f"Error saving patient data: {str(ex)}")
-                
-            # Use a shorter sleep interval to be more responsive to immediate save requests
-            await asyncio.sleep(1)  # Check more frequently, but only save at regular intervals
-            
-            # Add a counter for regular autosaves to happen every 4 seconds
-            if not hasattr(self, 'autosave_counter'):
-                self.autosave_counter = 0
-            
-            self.autosave_counter += 1
-            # Reset counter after 4 iterations (4 seconds with 1-second sleep)
-            if self.autosave_counter >= 4:
-                self.autosave_counter = 0
     
     def save_button_clicked(self, e):
         """Save patient data when save button is clicked"""
@@ -902,96 +1379,149 @@ class PatientApp:
             self.update_status("Saving patient data...")
             
         except Exception as ex:
-            print(f"Error saving data: {str(ex)}")
-            traceback.print_exc()
+            logger.exception("Error saving data")
             self.update_status(f"Error saving data: {str(ex)}")
     
     def request_immediate_save(self):
         """Flag that we want an immediate save to happen"""
         self.immediate_save_requested = True
+        self._wake_autosave()
     
-    def clear_form(self, e):
+    async def clear_form(self, e):
         """Clear all form fields"""
+        # Don't drop the current patient's edits still waiting for autosave
+        if not await self._flush_pending_save():
+            return
         self.patient_data = {
             "patient_id": "",
             "name": "",
             "surname": "",
-            "date": datetime.date.today().strftime("%Y-%m-%d"),
+            "date": self._today_str(),
             "initial_description": "",
             "scintigraphy": "",
             "fdg_pet": "",
             "additional_notes": ""  # Added new field
         }
         
-        self.name_field.value = ""
-        self.surname_field.value = ""
-        self.date_field.value = datetime.date.today().strftime("%Y-%m-%d")
-        self.patient_id_field.value = ""
-        self.initial_description.value = ""
-        self.scintigraphy.value = ""
-        self.fdg_pet.value = ""
-        self.additional_notes.value = ""  # Clear additional notes field
+        for key, field in self._fields.items():
+            field.value = self.patient_data[key]
         self.original_patient_id = None
+        self._dirty = False
         
-        if self.page:
-            self.page.update()
+        # update_status flushes the cleared fields along with the message
         self.update_status("Form cleared")
     
+    def _today_str(self):
+        """Today's date as YYYY-MM-DD, formatted once per calendar day"""
+        today = datetime.date.today()
+        if self._today_cache[0] != today:
+            self._today_cache = (today, today.isoformat())
+        return self._today_cache[1]
+    
     def update_status(self, message, temporary=False):
         """Update status message at the bottom of the page"""
-        print(f"Status: {message}")
-        
         if not self.page:
-            print(f"Warning: Page reference is None, can't update UI status")
+            logger.warning("Page reference is None, can't update UI status")
             return
             
         self.status_text.value = message
-        self.page.update()
+        self.schedule_update()
         
-        if temporary:
-            # Cancel any existing timer task
-            if hasattr(self, 'status_clear_task') and self.status_clear_task:
-                try:
-                    self.status_clear_task.cancel()
-                except:
-                    pass
-                
-            # Schedule a new task to clear the status text after a delay
-            self.schedule_status_clear()
+        # A temporary message (re)starts the clear countdown; a lasting one
+        # stops a pending clear from wiping it. May run in a worker thread.
+        if temporary or self._status_clear_at is not None:
+            self.page.loop.call_soon_threadsafe(self.schedule_status_clear, temporary)
     
-    def schedule_status_clear(self):
-        """Schedule clearing of status text using a background task"""
-        async def clear_status_after_delay():
-            try:
-                await asyncio.sleep(3)  # Wait for 3 seconds
-                if self.page:
-                    self.status_text.value = ""
-                    self.page.update()
-            except asyncio.CancelledError:
-                pass  # Task was cancelled, which is fine
-            except Exception as ex:
-                print(f"Error clearing status: {str(ex)}")
-                
-        # Create and store the task
-        self.status_clear_task = asyncio.create_task(clear_status_after_delay())
+    def schedule_update(self):
+        """Request a page update; requests made before it runs share a single update"""
+        if self._update_pending or not self.page:
+            return
+        self._update_pending = True
+        # Handlers may run in worker threads, so hand the flush to the event loop
+        self.page.loop.call_soon_threadsafe(self._flush_update)
+    
+    def _flush_update(self):
+        """Send all control changes made since the update was requested"""
+        self._update_pending = False
+        if self.page:
+            self.page.update()
+    
+    def schedule_status_clear(self, temporary=True):
+        """Set or drop the deadline for clearing the status text (event loop only)"""
+        if not temporary:
+            self._status_clear_at = None
+            return
+        self._status_clear_at = self.page.loop.time() + STATUS_CLEAR_SECONDS
+        # One long-lived task serves every temporary message
+        if self.status_clear_task is None:
+            self.status_clear_task = asyncio.create_task(self._clear_status_when_due())
+        else:
+            self._status_wake.set()
+    
+    async def _clear_status_when_due(self):
+        """Clear the status text whenever its deadline passes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            deadline = self._status_clear_at
+            if deadline is None:
+                await self._status_wake.wait()
+                self._status_wake.clear()
+                continue
+            delay = deadline - loop.time()
+            if delay > 0:
+                # A newer message may move the deadline while this sleeps
+                await asyncio.sleep(delay)
+                continue
+            self._status_clear_at = None
+            self.status_text.value = ""
+            # Only the status text changed - send just that control instead
+            # of diffing the whole page
+            if self.status_text.page:
+                self.status_text.update()
     
     def toggle_fdg_pet_visibility(self, e):
         """Toggle visibility of FDG PET field"""
         self.show_fdg_pet = e.control.value
         self.fdg_pet.visible = self.show_fdg_pet
-        if self.page:
-            self.page.update()
+        self.schedule_update()
     
     def toggle_additional_notes_visibility(self, e):
         """Toggle visibility of Additional Notes field"""
         self.show_additional_notes = e.control.value
         self.additional_notes.visible = self.show_additional_notes
-        if self.page:
-            self.page.update()
+        self.schedule_update()
+
+
+def _configure_logging():
+    """Log to a rotating file next to the app; the console only gets warnings"""
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)
+    handlers = [console_handler]
+    log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "patient_app.log")
+    try:
+        # Checked up front: with delay=True the handler only opens the file on
+        # the first record, and a read-only install folder must not stop the app
+        open(log_file, "a").close()
+    except OSError:
+        pass  # Console only
+    else:
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=1_000_000, backupCount=3, encoding="utf-8", delay=True
+        )
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        handlers.insert(0, file_handler)
+    logging.basicConfig(level=logging.WARNING, handlers=handlers)
+    # Progress messages name patients and their folders, so they are only
+    # written when asked for, e.g. PATIENT_APP_LOG_LEVEL=INFO
+    try:
+        logger.setLevel(os.environ.get("PATIENT_APP_LOG_LEVEL", "WARNING").upper())
+    except ValueError:
+        logger.setLevel(logging.WARNING)
 
 
 async def main(page: ft.Page):
     app = PatientApp()
     await app.main(page)
 
+_configure_logging()
 ft.app(target=main)
\ No newline at end of file